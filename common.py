@@ -41,7 +41,7 @@ def load_pdf_file(filename):
     # with open(filename, 'rb') as f:
     #     return f.read()
 
-def extract_pdf_from_zip(filename):
+def extract_pdf_from_zip(filename, path=None):
     logging.debug('Extracting zip..')
     zf = zipfile.ZipFile(filename, 'r')
 
@@ -52,6 +52,6 @@ def extract_pdf_from_zip(filename):
         raise Exception("Didn't find an english pdf file in the zip archive")
 
     zippasswd = open('.zippasswd', 'rb').read()
-    zf.extract(pdffile.filename, pwd=zippasswd)
+    pdfname = zf.extract(pdffile.filename, path=path, pwd=zippasswd)
     logging.debug('done.')
-    return pdffile.filename
+    return pdfname
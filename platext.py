@@ -6,17 +6,22 @@
 Usage:
   platext.py (extract | gnucash | verify) <file> [--debug]
   platext.py [--assumptions] verify <file> [--debug]
+  platext.py audit <files>... [--jobs=<n>] [--top=<n>] [--debug]
 
 Commands:
   extract       Outputs payslip as a dict
   gnucash       Outputs payslip in a gnucash-friendly table
   verify        Checks if payslip info are correct
+  audit         Verifies many payslips in parallel and summarizes the failures
 
 Arguments:
   file          A text file containing the text layer of the .pdf payslip
+  files         Payslips to audit (same formats as <file>)
 
 Options:
   -a --assumptions  Show which assumptions were made at verification
+  -j --jobs=<n>     Number of worker processes [default: all cpus]
+  -t --top=<n>      Number of largest differences to show [default: 10]
   -d --debug        Show debug messages
 """
 
@@ -25,10 +30,13 @@ import os
 import sys
 import json
 import logging
+import tempfile
 
 from math import ceil, floor
 from datetime import date
 from itertools import count
+from collections import Counter
+from multiprocessing import Pool
 
 from common import clean_num, clean_hours, pretty, setup_logging, load_pdf_file, extract_pdf_from_zip
 
@@ -537,11 +545,10 @@ class IncomeVerificator():
         return [name, status, difference, claimed, calculated]
 
 
-    def verify(self, assumptions=False):
-        if assumptions:
-            self.assumptions()
-
-        print("Verification")
+    def results(self):
+        """
+        Returns a list of (name, claimed, calculated) tuples for all checks.
+        """
         results = [
             self.verify_gross(),
             self.verify_net(),
@@ -551,6 +558,14 @@ class IncomeVerificator():
         results.extend(
             self.verify_taxes()
         )
+        return results
+
+    def verify(self, assumptions=False):
+        if assumptions:
+            self.assumptions()
+
+        print("Verification")
+        results = self.results()
 
         table   = [self._verification_tuple_to_printable(result) for result in results] 
         headers = ['Test', 'Result', 'Diff', 'Claim', 'Calc.']
@@ -570,6 +585,78 @@ class IncomeVerificator():
         elif days < 0:
             print("\nWARNING: you have {} days worth of meal tickets more.".format(-days))
 
+def _audit_slip(filename):
+    """
+    Worker for `audit`: verifies a single payslip.
+    Returns (filename, rows, error) where rows are the printable verification rows.
+    """
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            text = load_payslip(filename, tmpdir)
+        iv = IncomeVerificator(IncomeExtractor(text))
+        rows = [iv._verification_tuple_to_printable(result) for result in iv.results()]
+    except Exception as e:
+        return (filename, None, '{}: {}'.format(type(e).__name__, e))
+    return (filename, rows, None)
+
+def audit(filenames, jobs=None, top=10):
+    """
+    Verifies many payslips in a worker pool and prints a summary of failures.
+    """
+    with Pool(jobs) as pool:
+        audited = pool.map(_audit_slip, filenames)
+
+    rule_counts = Counter()
+    failures = []
+    errors = []
+    for filename, rows, error in audited:
+        if error:
+            errors.append([filename, error])
+            continue
+        for name, status, difference, claimed, calculated in rows:
+            if status != 'OK':
+                rule_counts[name, status] += 1
+                failures.append([filename, name, status, difference, claimed, calculated])
+
+    print("Audited {} payslips, {} failed checks, {} unreadable".format(
+        len(filenames), len(failures), len(errors)))
+
+    if rule_counts:
+        print()
+        table = [[name, status, n] for (name, status), n in rule_counts.most_common()]
+        print(tabulate(table, headers=['Test', 'Result', 'Count']))
+
+    if failures:
+        print()
+        largest = sorted(failures, key=lambda row: abs(row[3]), reverse=True)[:top]
+        print(tabulate(largest, headers=['File', 'Test', 'Result', 'Diff', 'Claim', 'Calc.']))
+
+        print()
+        affected = Counter(row[0] for row in failures)
+        table = [[filename, n] for filename, n in sorted(affected.items())]
+        print(tabulate(table, headers=['Affected file', 'Failed checks']))
+
+    if errors:
+        print()
+        print(tabulate(errors, headers=['Unreadable file', 'Error']))
+
+def load_payslip(filename, tmpdir=None):
+    """
+    Returns the text layer of a .pdf payslip, possibly zipped.
+    Zipped pdfs are extracted to `tmpdir` (current directory by default) and removed afterwards.
+    """
+    if filename.lower().endswith('.zip'):
+        pdfname = extract_pdf_from_zip(filename, tmpdir)
+    else:
+        pdfname = filename
+
+    text = load_pdf_file(pdfname)
+
+    if filename.lower().endswith('.zip'):
+        os.remove(pdfname)
+
+    return text
+
 def quickinit():
     filename = 'test_samples/vyp-2016-04-en.txt'
     text = open(filename, 'r').read()
@@ -583,26 +670,24 @@ def main():
     ds = [date(y,m,1) for y in [2015,2016] for m in range(1,13)]
     ds = {d.strftime('%b%y').lower(): 'test_samples/vyp-{}-en.pdf'.format(d.strftime('%Y-%m')) for d in ds}
 
+    if args['audit']:
+        filenames = [ds.get(filename, filename) for filename in args['<files>']]
+        jobs = None if args['--jobs'] == 'all cpus' else int(args['--jobs'])
+        audit(filenames, jobs=jobs, top=int(args['--top']))
+        return
+
     filename = args['<file>']
 
     if filename in ds:
         filename = ds[filename]
 
-    if filename.lower().endswith('.zip'):
-        pdfname = extract_pdf_from_zip(filename)
-    else:
-        pdfname = filename
-
     try:
         #text = open(filename, 'r').read()
-        text = load_pdf_file(pdfname)
-    except FileNotFoundError:
-        print("File not found: {}".format(pdfname))
+        text = load_payslip(filename)
+    except FileNotFoundError as e:
+        print("File not found: {}".format(e.filename))
         sys.exit(1)
 
-    if filename.lower().endswith('.zip'):
-        os.remove(pdfname)
-
     ie = IncomeExtractor(text)
 
     if args['extract']: